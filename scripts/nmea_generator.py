@@ -4,7 +4,10 @@ NMEA generator module.
 This module generates NMEA (GPGGA) sentence for GPS data simulation.
 """
 
+import operator
+import struct
 import time
+from functools import reduce
 
 
 class NMEAGenerator:
@@ -15,21 +18,23 @@ class NMEAGenerator:
     sentences.
     """
 
+    __slots__ = (
+        'fix_latitude',
+        'fix_longitude',
+        'fix_altitude',
+        '_gga_static_checksum',
+        '_gga_sentence',
+        '_gga_time_offset',
+        '_last_gga_time',
+        '_last_gga_sentence',
+    )
+
     def __init__(self, fix_latitude, fix_longitude, fix_altitude):
         """Initialise class."""
         self.fix_latitude = fix_latitude
         self.fix_longitude = fix_longitude
         self.fix_altitude = fix_altitude
 
-    def _calculate_checksum(self, nmea_str):
-        """Calculate the NMEA checksum."""
-        checksum = 0
-        for char in nmea_str:
-            checksum ^= ord(char)
-        return f'{checksum:02X}'
-
-    def generate_gga_sentence(self):
-        """Generate NMEA GGA sentence."""
         lat_deg = int(self.fix_latitude)
         lat_min = (self.fix_latitude - lat_deg) * 60
         lat_hemisphere = 'N' if self.fix_latitude >= 0 else 'S'
@@ -38,28 +43,104 @@ class NMEAGenerator:
         lon_min = (abs(self.fix_longitude) - lon_deg) * 60
         lon_hemisphere = 'E' if self.fix_longitude >= 0 else 'W'
 
-        current_time = time.strftime('%H%M%S', time.gmtime())
-        gga = (
-            f'GPGGA,{current_time},{lat_deg:02d}{lat_min:07.4f},'
+        # The fix location never changes, so every GGA field except the
+        # time is formatted (and XOR-ed for the checksum) only once
+        gga_prefix = 'GPGGA,'
+        gga_suffix = (
+            f',{lat_deg:02d}{lat_min:07.4f},'
             f'{lat_hemisphere},{lon_deg:03d}{lon_min:07.4f},'
             f'{lon_hemisphere},1,08,0.9,{self.fix_altitude:.1f},M,46.9,M,,'
         )
+        self._gga_static_checksum = self._xor_reduce(
+            f'{gga_prefix}{gga_suffix}'.encode('ascii')
+        )
 
-        checksum = self._calculate_checksum(gga)
-        return f'${gga}*{checksum}'
+        # Sentence buffer where only the time and checksum get rewritten
+        self._gga_sentence = bytearray(
+            f'${gga_prefix}000000{gga_suffix}*00\r\n'.encode('ascii')
+        )
+        self._gga_time_offset = 1 + len(gga_prefix)
+        self._last_gga_time = None
+        self._last_gga_sentence = None
+
+    def _xor_reduce(self, data):
+        """XOR all bytes of `data` together."""
+        # XOR the data eight bytes at a time, then fold the 64-bit
+        # result down to one byte. Zero padding does not alter the XOR.
+        data += bytes(-len(data) % 8)
+        lanes = struct.unpack(f'<{len(data) // 8}Q', data)
+        checksum = reduce(operator.xor, lanes, 0)
+        checksum ^= checksum >> 32
+        checksum ^= checksum >> 16
+        checksum ^= checksum >> 8
+        return checksum & 0xFF
+
+    def generate_gga_sentence(self, hhmmss=None):
+        """
+        Generate NMEA GGA sentence.
+
+        Args:
+            hhmmss (str): UTC time of the fix as HHMMSS. If omitted,
+                the current UTC time is used.
+
+        Returns:
+            bytes: ASCII encoded GGA sentence, ending in CRLF.
+        """
+        if hhmmss is None:
+            now = time.gmtime()
+            utc_time = now.tm_hour * 10000 + now.tm_min * 100 + now.tm_sec
+        else:
+            utc_time = int(hhmmss)
+
+        # Sentences are requested at 10 Hz but the time only has a
+        # resolution of one second, so most calls can reuse the last one
+        if utc_time == self._last_gga_time:
+            return self._last_gga_sentence
+
+        # Write the six time digits in place, right to left, folding them
+        # into the checksum in the same pass
+        sentence = self._gga_sentence
+        checksum = self._gga_static_checksum
+        digits = utc_time
+        start = self._gga_time_offset
+        for i in range(start + 5, start - 1, -1):
+            digits, digit = divmod(digits, 10)
+            char = digit + 0x30  # ASCII '0'
+            sentence[i] = char
+            checksum ^= char
+
+        sentence[-4:-2] = f'{checksum:02X}'.encode('ascii')
+
+        self._last_gga_time = utc_time
+        self._last_gga_sentence = bytes(sentence)
+        return self._last_gga_sentence
+
+    def has_valid_checksum(self, nmea_sentence: bytes) -> bool:
+        """Check the checksum of a raw NMEA sentence."""
+        # The checksum is the XOR of everything between '$' and '*'
+        star = nmea_sentence.rfind(b'*')
+        checksum_field = nmea_sentence[star + 1 : star + 3]  # noqa: E203
+        if star < 1 or len(checksum_field) != 2:
+            return False
 
-    def is_gpgga_data_valid(self, nmea_sentence: str) -> bool:
-        """Validate GPGGA data."""
         try:
-            # Split the sentence into its components
-            fields = nmea_sentence.split(',')
+            checksum = int(checksum_field, 16)
+        except ValueError:
+            return False
 
-            # Check the length of the fields, should be 14 or 15
-            if len(fields) < 14 or len(fields) > 15:
+        return self._xor_reduce(nmea_sentence[1:star]) == checksum
+
+    def is_gpgga_data_valid(self, nmea_sentence: bytes) -> bool:
+        """Validate raw GPGGA data."""
+        try:
+            # Check the number of fields, should be 14 or 15
+            num_fields = nmea_sentence.count(b',') + 1
+            if num_fields < 14 or num_fields > 15:
                 return False
 
-            # Validate GPS quality indicator (field 6)
-            gps_qual = int(fields[6])
+            # Validate GPS quality indicator (field 6). Only the fields up
+            # to it need splitting off
+            gps_qual = int(nmea_sentence.split(b',', 7)[6])
             if gps_qual == 0:
                 # If 0, data is not valid/reliable
                 return False
@@ -9,22 +9,32 @@ parses Novatel binary data, and handles RTCM messages.
 """
 
 import argparse
+import atexit
 import base64
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import selectors
 import socket
-import threading
+import struct
 import time
-from collections import defaultdict
+from collections import Counter
 from datetime import datetime
 
 import colorlog
 
 from nmea_generator import NMEAGenerator
 
-from pyrtcm import RTCMReader, exceptions
-
 import yaml
 
+# Use the libyaml parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 class NtripClient:
     """
@@ -51,21 +61,56 @@ class NtripClient:
         self.gnss_socket = None
         self.ntrip_connected = False
         self.nmea_request_sent = False
-        self.gnss_log_thread = None
-        self.stop_event = threading.Event()
+        self.ntrip_outage_logged = False
+        self.selector = selectors.DefaultSelector()
+        self.last_gnss_rx_time = 0.0
+        self.last_ntrip_rx_time = 0.0
         self.use_fix_location = use_fix_location
         self.debug_mode = debug_mode
-        self.received_rtcm_msgs_ids = defaultdict(int)
+        self._log = logging.getLogger(__name__)
+        self.received_rtcm_msgs_ids = Counter()
+        self.gnss_rx_buffer = bytearray()
+        self.rtcm_rx_buffer = bytearray()
         self.latest_nmea_data_valid = False
-        self.novatel_response_binary_dict = {
-            'response_id': {'offset': 28, 'size': 4},
-            'checksum': {'size': 4},
-        }
+        # Message length (header offset 8) and response ID (right after
+        # the 28-byte header) of a Novatel binary response
+        self.NOVATEL_RESPONSE = struct.Struct('<8xH18xI')
+        self.NOVATEL_HEADER_SIZE = 28
+        self.NOVATEL_CHECKSUM_SIZE = 4
         self.NOVATEL_OK_ID = 1
+        # Start of a Novatel binary message or of an NMEA sentence
+        self.GNSS_MSG_START = re.compile(
+            rb'(?P<binary>\xaaD\x12\x1c)|(?P<ascii>\$GP)'
+        )
         self.SOCKET_BUFFER_SIZE = 2048
         # Indicates the start of an RTCM message
         self.RTCM_DATA_PREAMBLE = 0xD3
+        # Preamble + 6 reserved bits + 10-bit payload length
+        self.RTCM_HEADER_SIZE = 3
+        # Header + 3-byte CRC surrounding the payload
+        self.RTCM_FRAME_OVERHEAD = self.RTCM_HEADER_SIZE + 3
+        # Status lines a caster answers with when it starts the stream
+        self.NTRIP_OK_RESPONSES = (
+            b'ICY 200 OK',
+            b'HTTP/1.0 200 OK',
+            b'HTTP/1.1 200 OK',
+        )
         self.PAUSE_DURATION = 1.0
+        # Time without data after which a stream is considered stalled
+        self.GNSS_TIMEOUT = 5
+        self.NTRIP_TIMEOUT = 6
+        # Silence that ends the configuration reply, and upper bound on
+        # how long the reply is read for
+        self.GNSS_CONFIG_QUIET_TIME = 0.2
+        self.GNSS_CONFIG_READ_TIME = 1.0
+        # TCP keepalive: idle time before probing, probe interval (seconds)
+        # and unanswered probes before the connection is dropped
+        self.KEEPALIVE_IDLE = 30
+        self.KEEPALIVE_INTERVAL = 10
+        self.KEEPALIVE_COUNT = 3
+        # Reusable receive buffers, so reads do not allocate a new object
+        self.gnss_recv_view = memoryview(bytearray(self.SOCKET_BUFFER_SIZE))
+        self.ntrip_recv_view = memoryview(bytearray(self.SOCKET_BUFFER_SIZE))
 
         self.configure_logging()
 
@@ -107,12 +152,24 @@ class NtripClient:
         )
         file_handler.setLevel(logging.DEBUG)
 
-        # Get the root logger and add the handlers
+        # Records are formatted by the caller and queued, while a background
+        # thread does the console and file writes
+        log_queue = queue.SimpleQueue()
+        self.log_listener = logging.handlers.QueueListener(
+            log_queue,
+            console_handler,
+            file_handler,
+            respect_handler_level=True,
+        )
+        self.log_listener.start()
+        # Write out whatever is still queued when the process exits
+        atexit.register(self.log_listener.stop)
+
+        # Get the root logger and add the queue handler
         logger = logging.getLogger()
         # Set root logger level to DEBUG to ensure all messages are processed
         logger.setLevel(logging.DEBUG)
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     def load_config(self, config_path):
         """
@@ -126,7 +183,7 @@ class NtripClient:
         """
         try:
             with open(config_path) as file:
-                config = yaml.safe_load(file)
+                config = yaml.load(file, Loader=SafeLoader)
                 self.gnss_host = config['gnss_host']
                 self.gnss_port = config['gnss_port']
                 self.ntrip_host = config['ntrip_host']
@@ -137,77 +194,142 @@ class NtripClient:
                 self.fix_latitude = config['fix_latitude']
                 self.fix_longitude = config['fix_longitude']
                 self.fix_altitude = config['fix_altitude']
+                # Optional CPU to run the client on
+                self.cpu_affinity = config.get('cpu_affinity')
+                if self.cpu_affinity is not None and (
+                    not isinstance(self.cpu_affinity, int)
+                    or isinstance(self.cpu_affinity, bool)
+                    or self.cpu_affinity < 0
+                ):
+                    self._log.error(
+                        'Invalid cpu_affinity %r: expected a CPU number.',
+                        self.cpu_affinity,
+                    )
+                    raise SystemExit()
 
                 self.credentials = base64.b64encode(
                     f'{self.username}:{self.password}'.encode()
                 ).decode()
 
+                # The request never changes, so it is only built once
+                self.ntrip_request = (
+                    f'GET /{self.mountpoint} HTTP/1.0\r\n'
+                    f'Host: {self.ntrip_host}\r\n'
+                    f'Ntrip-Version: Ntrip/1.0\r\n'
+                    f'User-Agent: NTRIP PythonClient/1.0\r\n'
+                    f'Authorization: Basic {self.credentials}\r\n'
+                    '\r\n'
+                ).encode()
+
         except FileNotFoundError:
-            logging.error(
-                f'Configuration file at {config_path} does not exist.'
+            self._log.error(
+                'Configuration file at %s does not exist.', config_path
             )
             raise SystemExit()
         except yaml.YAMLError as e:
-            logging.error(f'Error parsing the configuration file: {e}')
+            self._log.error('Error parsing the configuration file: %s', e)
             raise SystemExit()
         except KeyError as e:
-            logging.error(f'Missing required YAML parameter: {e}')
+            self._log.error('Missing required YAML parameter: %s', e)
             raise SystemExit()
 
+    def enable_dead_peer_detection(self, sock, timeout=None):
+        """
+        Make the kernel drop connections to a peer that went away.
+
+        Keepalive probes catch a peer that vanished while the link is
+        idle, and the user timeout one that vanished with data in flight.
+        Both are only tuned where the platform exposes the options.
+
+        Args:
+            sock (socket.socket): Socket to configure.
+            timeout (float, optional): Time in seconds that sent data may
+                stay unacknowledged. No user timeout is set if None.
+        """
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        # These options are only available on Linux
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.KEEPALIVE_IDLE
+            )
+            sock.setsockopt(
+                socket.IPPROTO_TCP,
+                socket.TCP_KEEPINTVL,
+                self.KEEPALIVE_INTERVAL,
+            )
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPCNT, self.KEEPALIVE_COUNT
+            )
+        if timeout is not None and hasattr(socket, 'TCP_USER_TIMEOUT'):
+            sock.setsockopt(
+                socket.IPPROTO_TCP,
+                socket.TCP_USER_TIMEOUT,
+                int(timeout * 1000),
+            )
+
+    def pin_to_cpu(self):
+        """Run the client on the configured CPU, if any."""
+        if self.cpu_affinity is None:
+            return
+
+        try:
+            os.sched_setaffinity(0, {self.cpu_affinity})
+            self._log.info('Client pinned to CPU %s', self.cpu_affinity)
+        except (AttributeError, OSError) as e:
+            self._log.warning(
+                'Unable to pin client to CPU %s: %s', self.cpu_affinity, e
+            )
+
     def connect_ntrip_server(self):
         """Connect to the NTRIP server."""
         self.ntrip_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.ntrip_socket.settimeout(6)
-
-        logging.info(
-            f'Attempting to connect to NTRIP server at'
-            f' {self.ntrip_host}:{self.ntrip_port}'
+        self.ntrip_socket.settimeout(self.NTRIP_TIMEOUT)
+        # Send the small NMEA messages right away instead of coalescing them
+        self.ntrip_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Detect NTRIP streams that were silently dropped by the caster
+        self.enable_dead_peer_detection(self.ntrip_socket, self.NTRIP_TIMEOUT)
+
+        self._log.info(
+            'Attempting to connect to NTRIP server at %s:%s',
+            self.ntrip_host,
+            self.ntrip_port,
         )
 
         try:
             self.ntrip_socket.connect((self.ntrip_host, self.ntrip_port))
         except socket.gaierror as e:
-            logging.error(
+            self._log.error(
                 'Unable to connect to NTRIP server:'
-                f' DNS resolution failed: {e}'
+                ' DNS resolution failed: %s',
+                e,
             )
             return False
         except socket.timeout:
-            logging.error(
+            self._log.error(
                 'Unable to connect to NTRIP server: Connection timed out'
             )
             return False
         except OSError as e:
-            logging.error(f'Unable to connect to NTRIP server: {e}')
+            self._log.error('Unable to connect to NTRIP server: %s', e)
             return False
 
-        request = (
-            f'GET /{self.mountpoint} HTTP/1.0\r\n'
-            f'Host: {self.ntrip_host}\r\n'
-            f'Ntrip-Version: Ntrip/1.0\r\n'
-            f'User-Agent: NTRIP PythonClient/1.0\r\n'
-            f'Authorization: Basic {self.credentials}\r\n'
-            f'\r\n'
-        )
-        self.ntrip_socket.send(request.encode())
-
         try:
-            response = self.ntrip_socket.recv(self.SOCKET_BUFFER_SIZE).decode(
-                'ISO-8859-1'
-            )
+            self.ntrip_socket.sendall(self.ntrip_request)
+            response = self.ntrip_socket.recv(self.SOCKET_BUFFER_SIZE)
         except (OSError, socket.timeout) as e:
-            logging.error(f'Error getting response from NTRIP: {e}')
+            self._log.error('Error getting response from NTRIP: %s', e)
             return False
 
-        if any(
-            success in response
-            for success in ['ICY 200 OK', 'HTTP/1.0 200 OK', 'HTTP/1.1 200 OK']
-        ):
+        if response.startswith(self.NTRIP_OK_RESPONSES):
             self.ntrip_connected = True
-            logging.info('Successfully connected to NTRIP server.')
+            self.ntrip_outage_logged = False
+            self.rtcm_rx_buffer.clear()
+            self.last_ntrip_rx_time = time.monotonic()
+            self._log.info('Successfully connected to NTRIP server.')
             return True
 
-        logging.error('Failed to connect to NTRIP server.')
+        self._log.error('Failed to connect to NTRIP server.')
         return False
 
     def disconnect_ntrip_server(self):
@@ -217,54 +339,77 @@ class NtripClient:
             try:
                 self.ntrip_socket.shutdown(socket.SHUT_RDWR)
             except (OSError, socket.timeout) as e:
-                logging.error(f'Exception when shutting down the socket: {e}')
+                self._log.error(
+                    'Exception when shutting down the socket: %s', e
+                )
             try:
                 self.ntrip_socket.close()
             except (OSError, socket.timeout) as e:
-                logging.error(f'Exception when closing the socket: {e}')
+                self._log.error('Exception when closing the socket: %s', e)
 
     def connect_to_gnss(self):
         """Connect to the GNSS receiver."""
         self.gnss_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.gnss_socket.settimeout(5)
-
-        logging.info(
-            f'Attempting to connect to GNSS receiver at'
-            f' {self.gnss_host}:{self.gnss_port}'
+        self.gnss_socket.settimeout(self.GNSS_TIMEOUT)
+        # Forward RTCM corrections right away instead of coalescing them
+        self.gnss_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # There is no GNSS reconnect path, so a stalled write must not
+        # drop the link for good; only keepalive probes are enabled
+        self.enable_dead_peer_detection(self.gnss_socket)
+
+        self._log.info(
+            'Attempting to connect to GNSS receiver at %s:%s',
+            self.gnss_host,
+            self.gnss_port,
         )
 
         try:
             self.gnss_socket.connect((self.gnss_host, self.gnss_port))
-            logging.info('Successfully connected to GNSS receiver.')
+            self._log.info('Successfully connected to GNSS receiver.')
             return True
         except (OSError, socket.timeout) as e:
-            logging.error(f'Unable to connect to GNSS receiver: {e}')
+            self._log.error('Unable to connect to GNSS receiver: %s', e)
             return False
 
     def configure_gnss(self):
         """Configure the GNSS port to log NMEA data."""
         configure_command = (
-            '\r\n'
-            'unlogall thisport\r\n'
-            'log gpggalong ontime 0.1\r\n'
-            'log gprmc ontime 0.1\r\n'
-            'log gpgst ontime 0.2\r\n'
-            'interfacemode rtcmv3 novatel\r\n'  # Set RX and TX
+            b'\r\n'
+            b'unlogall thisport\r\n'
+            b'log gpggalong ontime 0.1\r\n'
+            b'log gprmc ontime 0.1\r\n'
+            b'log gpgst ontime 0.2\r\n'
+            b'interfacemode rtcmv3 novatel\r\n'  # Set RX and TX
         )
 
-        logging.debug(f'Configuring GNSS {self.gnss_port} port')
+        self._log.debug('Configuring GNSS %s port', self.gnss_port)
 
         try:
-            self.gnss_socket.sendall(configure_command.encode('utf-8'))
+            self.gnss_socket.sendall(configure_command)
+
+            # Read the response to confirm configuration. It can arrive in
+            # several pieces, so read until the receiver goes quiet, or for
+            # a bounded time as the NMEA logs may already be streaming
+            response = bytearray()
+            deadline = time.monotonic() + self.GNSS_CONFIG_READ_TIME
+            self.gnss_socket.settimeout(self.GNSS_CONFIG_QUIET_TIME)
+            try:
+                while time.monotonic() < deadline:
+                    size = self.gnss_socket.recv_into(self.gnss_recv_view)
+                    if not size:
+                        break
+                    response += self.gnss_recv_view[:size]
+            except socket.timeout:
+                pass
+            finally:
+                self.gnss_socket.settimeout(self.GNSS_TIMEOUT)
 
-            # Read the response to confirm configuration
-            response = self.gnss_socket.recv(self.SOCKET_BUFFER_SIZE).decode(
-                'utf-8'
+            self._log.info('GNSS receiver successfully configured.')
+            self._log.debug(
+                'GNSS response: %s', response.decode('utf-8', 'replace')
             )
-            logging.info('GNSS receiver successfully configured.')
-            logging.debug(f'GNSS response: {response}')
         except (OSError, socket.timeout) as e:
-            logging.error(f'Failed to send configuration: {e}')
+            self._log.error('Failed to configure GNSS receiver: %s', e)
 
     def parse_novatel_binary(self, data):
         """
@@ -279,26 +424,30 @@ class NtripClient:
         Args:
             data (bytes): Binary data from Novatel.
         """
-        # Extract relevant metadata from the response dictionary
-        resp_info = self.novatel_response_binary_dict['response_id']
-        resp_id_end = resp_info['offset'] + resp_info['size']
-        checksum_size = self.novatel_response_binary_dict['checksum']['size']
-
-        # Decode the response ID
-        resp_id = int.from_bytes(
-            data[resp_info['offset'] : resp_id_end],  # noqa: E203
-            byteorder='little',
-        )
+        if len(data) < self.NOVATEL_RESPONSE.size:
+            self._log.warning('Incomplete GNSS binary response: %s', data)
+            return
 
-        # Extract the remaining response content, excluding the checksum
-        resp = data[resp_id_end:-checksum_size]  # noqa: E203
+        # Decode the message length and response ID in one go
+        msg_length, resp_id = self.NOVATEL_RESPONSE.unpack_from(data)
+
+        msg_end = self.NOVATEL_HEADER_SIZE + msg_length
+        if len(data) < msg_end + self.NOVATEL_CHECKSUM_SIZE:
+            self._log.warning('Incomplete GNSS binary response: %s', data)
+            return
+
+        # The response string fills the rest of the message body
+        resp = data[self.NOVATEL_RESPONSE.size : msg_end]  # noqa: E203
 
         # Log the response based on the response ID
         if resp_id == self.NOVATEL_OK_ID:
-            logging.debug(f'GNSS response: {resp.decode()}')
+            self._log.debug(
+                'GNSS response: %s', resp.decode('utf-8', 'replace')
+            )
         else:
-            logging.warning(
-                f'GNSS returned an unexpected response: {resp.decode()}'
+            self._log.warning(
+                'GNSS returned an unexpected response: %s',
+                resp.decode('utf-8', 'replace'),
             )
 
     def split_data(self, data):
@@ -316,149 +465,202 @@ class NtripClient:
                 - ascii_msgs (list): Extracted ASCII messages.
                 - binary_msgs (list): Extracted binary messages.
         """
-        # Define the headers
-        binary_header = b'\xaaD\x12\x1c'
-        ascii_start = b'$GP'
-
         binary_msgs = []
         ascii_msgs = []
 
-        i = 0
         length = len(data)
+        find_msg_start = self.GNSS_MSG_START.search
 
-        while i < length:
-            if data.startswith(binary_header, i):
-                # Found the start of a binary message
-                start = i
-                i += len(binary_header)
-
-                # Find the next binary header or ASCII start
-                next_binary_index = data.find(binary_header, i)
-                next_ascii_index = data.find(ascii_start, i)
-
-                if next_binary_index == -1:
-                    next_binary_index = length
-                if next_ascii_index == -1:
-                    next_ascii_index = length
+        match = find_msg_start(data)
+        while match:
+            start = match.start()
 
-                # Determine the end of the current binary message
-                end = min(next_binary_index, next_ascii_index)
-
-                # Extract and store the binary message
+            if match.lastgroup == 'binary':
+                # A binary message runs up to the start of the next message
+                match = find_msg_start(data, match.end())
+                end = match.start() if match else length
                 binary_msgs.append(data[start:end])
 
-                # Move index past this message
-                i = end
-
-            elif data.startswith(ascii_start, i):
-                # Found the start of an ASCII message
-                start = i
+            else:
                 # Find the end of this ASCII message
-                end = data.find(b'\r\n', i)
+                end = data.find(b'\r\n', start)
                 if end == -1:
                     # If no end delimiter is found,
                     #   process till the end of data
                     end = length
                 else:
                     end += len(b'\r\n')
-                # Extract and store the ASCII message
                 ascii_msgs.append(data[start:end])
-                # Move index past this message
-                i = end
-
-            else:
-                # Move to the next byte if no start of a message is found
-                i += 1
+                match = find_msg_start(data, end)
 
         return ascii_msgs, binary_msgs
 
-    def read_nmea_and_send_to_server(self):
-        """Read incoming messages from the GNSS receiver."""
-        while not self.stop_event.is_set():
+    def pop_complete_gnss_data(self):
+        """
+        Take all complete messages out of the GNSS receive buffer.
 
-            if not self.gnss_socket:
-                logging.warning('GNSS socket not connected.')
-                time.sleep(self.PAUSE_DURATION)
-                continue
+        A single `recv` can end in the middle of an NMEA sentence, so an
+        unterminated sentence at the end of the buffer is kept until the
+        rest of it arrives with the next read.
 
-            try:
-                message = self.gnss_socket.recv(self.SOCKET_BUFFER_SIZE)
-                if not message:
-                    logging.warning('Empty msg received from GNSS')
-                    continue
+        Returns:
+            bytes: Buffered data up to the last complete message.
+        """
+        buffer = self.gnss_rx_buffer
+        end = len(buffer)
 
-                # Split messages into binary and ASCII types
-                ascii_msgs, binary_msgs = self.split_data(message)
+        last_ascii_start = buffer.rfind(b'$GP')
+        if (
+            last_ascii_start != -1
+            and buffer.find(b'\r\n', last_ascii_start) == -1
+        ):
+            end = last_ascii_start
+        elif buffer.endswith((b'$', b'$G')):
+            end = buffer.rfind(b'$')
 
-                # Get GPGGA msg from ASCII msgs
-                nmea_sentence = next(
-                    (msg.decode() for msg in ascii_msgs if b'GPGGA' in msg),
-                    None,
-                )
+        data = bytes(buffer[:end])
+        del buffer[:end]
 
-                if nmea_sentence:
+        # A sentence never gets this long, drop whatever was held back
+        if len(buffer) > self.SOCKET_BUFFER_SIZE:
+            buffer.clear()
 
-                    if self.use_fix_location:
-                        generated_sentence = (
-                            self.nmea_generator.generate_gga_sentence()
-                        )
-                        self.latest_nmea_data_valid = True
-                        self.send_nmea_to_ntrip_server(generated_sentence)
-                    else:
+        return data
 
-                        self.latest_nmea_data_valid = (
-                            self.nmea_generator.is_gpgga_data_valid(
-                                nmea_sentence
-                            )
+    def drain_socket(self, sock, recv_view, rx_buffer):
+        """
+        Append everything received on `sock` so far to `rx_buffer`.
+
+        The socket is only made non-blocking for the drain, writes keep
+        its timeout so `sendall` never gives up partway through. Passing
+        MSG_DONTWAIT to `recv_into` would not do, Python waits for a socket
+        with a timeout to become readable before every receive.
+
+        Args:
+            sock (socket.socket): Socket to read from.
+            recv_view (memoryview): Reusable buffer to receive into.
+            rx_buffer (bytearray): Buffer the received data is added to.
+
+        Returns:
+            bool: False if the peer closed the connection, True otherwise.
+        """
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            while True:
+                try:
+                    size = sock.recv_into(recv_view)
+                except BlockingIOError:
+                    return True
+
+                if not size:
+                    return False
+
+                rx_buffer += recv_view[:size]
+        finally:
+            sock.settimeout(timeout)
+
+    def read_nmea_and_send_to_server(self):
+        """Read incoming messages from the GNSS receiver."""
+        try:
+            # Sentences spread over several TCP segments are handled in
+            # one pass
+            if self.drain_socket(
+                self.gnss_socket, self.gnss_recv_view, self.gnss_rx_buffer
+            ):
+                self.last_gnss_rx_time = time.monotonic()
+            else:
+                # The socket stays readable at EOF, so stop watching it
+                # instead of waking up for it on every pass. Whatever was
+                # read before the EOF is still processed below
+                self._log.warning('GNSS receiver closed the connection.')
+                self.unwatch_socket(self.gnss_socket)
+
+            # Split messages into binary and ASCII types
+            ascii_msgs, binary_msgs = self.split_data(
+                self.pop_complete_gnss_data()
+            )
+
+            # Get the most recent GPGGA msg from ASCII msgs
+            nmea_sentence = next(
+                (
+                    msg
+                    for msg in reversed(ascii_msgs)
+                    if msg.startswith(b'$GPGGA')
+                ),
+                None,
+            )
+
+            if nmea_sentence:
+
+                if self.use_fix_location:
+                    generated_sentence = (
+                        self.nmea_generator.generate_gga_sentence()
+                    )
+                    self.latest_nmea_data_valid = True
+                    self.send_nmea_to_ntrip_server(generated_sentence)
+                else:
+
+                    # Reject corrupted sentences before parsing any field
+                    self.latest_nmea_data_valid = (
+                        self.nmea_generator.has_valid_checksum(nmea_sentence)
+                        and self.nmea_generator.is_gpgga_data_valid(
+                            nmea_sentence
                         )
+                    )
 
-                        if self.latest_nmea_data_valid:
-                            self.send_nmea_to_ntrip_server(nmea_sentence)
-                        else:
-                            logging.debug(
-                                'NMEA data is not valid. '
-                                'Skipping sending it to NTRIP server.'
-                            )
+                    if self.latest_nmea_data_valid:
+                        self.send_nmea_to_ntrip_server(nmea_sentence)
+                    else:
+                        self._log.debug(
+                            'NMEA data is not valid. '
+                            'Skipping sending it to NTRIP server.'
+                        )
 
-                # Process binary messages
-                for binary_msg in binary_msgs:
-                    self.parse_novatel_binary(binary_msg)
+            # Process binary messages
+            for binary_msg in binary_msgs:
+                self.parse_novatel_binary(binary_msg)
 
-            except socket.timeout:
-                logging.warning(
-                    'Socket timeout occurred while reading GNSS data.'
-                )
-            except OSError as e:
-                logging.error(f'Error reading GNSS data: {e}')
-                logging.warning(f'Received: {message}')
+        except OSError as e:
+            self._log.error('Error reading GNSS data: %s', e)
+            self._log.warning('Received: %s', bytes(self.gnss_rx_buffer))
+        except (ValueError, IndexError) as e:
+            # Both sockets share one thread, so bad input is only dropped
+            self._log.warning('Dropped malformed GNSS data: %s', e)
 
     def send_rtcm_to_gnss(self, rctm_sentence):
-        """Send a RTCMv3 message to the GNSS receiver."""
+        """Send RTCMv3 messages to the GNSS receiver."""
         if self.gnss_socket:
             try:
-                self.gnss_socket.send(rctm_sentence)
-                logging.debug('RTCM message sent to GNSS')
+                self.gnss_socket.sendall(rctm_sentence)
+                self._log.debug('RTCM messages sent to GNSS')
 
             except (OSError, socket.timeout) as e:
-                logging.error(f'Error sending command to GNSS receiver: {e}')
+                self._log.error(
+                    'Error sending command to GNSS receiver: %s', e
+                )
         else:
-            logging.warning('GNSS socket not connected. Command not sent.')
+            self._log.warning('GNSS socket not connected. Command not sent.')
 
     def send_nmea_to_ntrip_server(self, nmea_sentence):
-        """Send NMEA sentence to NTRIP server in a separate thread."""
+        """Send NMEA sentence to NTRIP server."""
         if not self.ntrip_connected:
-            logging.debug('Not connected to NTRIP server. Cannot send NMEA.')
-            time.sleep(self.PAUSE_DURATION)
+            # Only report this once per outage, not for every sentence
+            if not self.ntrip_outage_logged:
+                self._log.debug(
+                    'Not connected to NTRIP server. Cannot send NMEA.'
+                )
+                self.ntrip_outage_logged = True
             return
 
-        request = f'{nmea_sentence}\r\n'
         try:
-            self.ntrip_socket.send(request.encode())
+            self.ntrip_socket.sendall(nmea_sentence)
             self.nmea_request_sent = True
         except (OSError, socket.timeout) as e:
-            logging.error(
-                f'Error sending NMEA sentence to NTRIP server: {e}'
-                f'\nAttempting to reconnect..'
+            self._log.error(
+                'Error sending NMEA sentence to NTRIP server: %s'
+                '\nAttempting to reconnect..',
+                e,
             )
             self.nmea_request_sent = False
             self.ntrip_connected = False
@@ -467,98 +669,235 @@ class NtripClient:
         """Check if data is RTCM correction."""
         return response_data[0] == self.RTCM_DATA_PREAMBLE
 
+    def get_rtcm_msg_id(self, frame):
+        """
+        Read the message number of an RTCMv3 frame.
+
+        The frame is forwarded to the GNSS as is, so only the 12-bit
+        message number at the start of the payload is decoded, for logging.
+
+        Args:
+            frame (bytes): RTCMv3 frame, including header and CRC.
+
+        Returns:
+            int: Message number, or None if `frame` does not carry one.
+        """
+        if len(frame) < self.RTCM_FRAME_OVERHEAD + 2 or frame[1] & 0xFC:
+            return None
+
+        return (frame[self.RTCM_HEADER_SIZE] << 4) | (
+            frame[self.RTCM_HEADER_SIZE + 1] >> 4
+        )
+
+    def pop_rtcm_frames(self):
+        """
+        Split the buffered NTRIP stream into RTCMv3 frames.
+
+        TCP reads can end anywhere within a frame, so frames are delimited
+        using the payload length in their header. A frame that is not
+        complete yet stays buffered until the rest of it arrives. Data
+        that is not part of an RTCMv3 frame is passed through as is, up
+        to the next preamble.
+
+        This is based on the RTCM 10403.3 transport layer (preamble,
+        6 reserved bits, 10-bit length, payload and CRC-24Q).
+
+        Returns:
+            list: Complete RTCMv3 frames and non-RTCM data, in order.
+        """
+        buffer = self.rtcm_rx_buffer
+        frames = []
+        start = 0
+
+        while start < len(buffer):
+            if buffer[start] == self.RTCM_DATA_PREAMBLE:
+                if len(buffer) - start < self.RTCM_HEADER_SIZE:
+                    break
+
+                length_msb = buffer[start + 1]
+                length_lsb = buffer[start + 2]
+
+                # The 6 reserved bits after the preamble must be zero
+                if not length_msb & 0xFC:
+                    payload_size = ((length_msb & 0x03) << 8) | length_lsb
+                    end = start + payload_size + self.RTCM_FRAME_OVERHEAD
+                    if end > len(buffer):
+                        break
+
+                    frames.append(bytes(buffer[start:end]))
+                    start = end
+                    continue
+
+            # Not the start of a frame, pass data up to the next preamble
+            end = buffer.find(self.RTCM_DATA_PREAMBLE, start + 1)
+            if end == -1:
+                end = len(buffer)
+            frames.append(bytes(buffer[start:end]))
+            start = end
+
+        del buffer[:start]
+
+        return frames
+
     def read_rtcm_and_send_to_gnss(self):
         """Read RTCM data and report back to GNSS."""
         try:
-            server_response = self.ntrip_socket.recv(self.SOCKET_BUFFER_SIZE)
-
-            if not server_response:
-                logging.warning('NTRIP server replied with an empty message')
-                time.sleep(self.PAUSE_DURATION)
+            # Frames spread over several TCP segments are forwarded in
+            # one pass
+            if not self.drain_socket(
+                self.ntrip_socket, self.ntrip_recv_view, self.rtcm_rx_buffer
+            ):
+                self._log.warning(
+                    'NTRIP server closed the connection. '
+                    'Attempting to reconnect...'
+                )
+                self.ntrip_connected = False
                 return
 
-            if self.is_rtcm_data(server_response):
+            self.last_ntrip_rx_time = time.monotonic()
 
-                try:
-                    rtcm_msg = RTCMReader.parse(server_response)
-                    logging.debug(
-                        f'RTCM data (ID: {rtcm_msg.identity}) received'
+            # Bind what the per-frame loop uses to locals
+            msg_ids = []
+            add_msg_id = msg_ids.append
+            is_rtcm_data = self.is_rtcm_data
+            get_rtcm_msg_id = self.get_rtcm_msg_id
+            log_debug = self._log.debug
+
+            frames = self.pop_rtcm_frames()
+            for server_response in frames:
+
+                if is_rtcm_data(server_response):
+
+                    msg_id = get_rtcm_msg_id(server_response)
+                    if msg_id is not None:
+                        log_debug('RTCM data (ID: %s) received', msg_id)
+
+                        add_msg_id(msg_id)
+
+                else:
+                    # We don't mind if the NTRIP server response was not
+                    # an RTCM message. The GNSS will know what to do
+                    # with it. We just log it for future reference
+                    log_debug(
+                        'Non-RTCM msg received from Ntrip server:\n%s',
+                        server_response,
                     )
 
-                    # Keep track of RTCM message IDs
-                    self.received_rtcm_msgs_ids[int(rtcm_msg.identity)] += 1
+            # Forward everything framed by this read with a single send
+            if frames:
+                self.send_rtcm_to_gnss(b''.join(frames))
 
-                except exceptions.RTCMParseError:
-                    # This catch is only to avoid runtime crashes
-                    pass
+            # Keep track of RTCM message IDs
+            self.received_rtcm_msgs_ids.update(msg_ids)
 
-            else:
-                # We don't mind if the NTRIP server response was not
-                # an RTCM message. The GNSS will know what to do
-                # with it. We just log it for future reference
-                logging.debug(
-                    f'Non-RTCM msg received from Ntrip server:\n'
-                    f'{server_response}'
-                )
+        except OSError as e:
+            self._log.error(
+                'Error reading RTCMv3 from NTRIP server: %s'
+                '\nAttempting to reconnect..',
+                e,
+            )
+            self.ntrip_connected = False
+        except (ValueError, IndexError) as e:
+            # Both sockets share one thread, so bad input is only dropped
+            self._log.warning('Dropped malformed RTCMv3 data: %s', e)
 
-            self.send_rtcm_to_gnss(server_response)
+    def check_connection_state(self):
+        """
+        Report what the client is waiting for and detect stalled streams.
 
-        except socket.timeout:
-            logging.warning(
+        Sockets are only read once they have data, so a stream going quiet
+        no longer shows up as a receive timeout and is checked here instead.
+        """
+        now = time.monotonic()
+
+        if now - self.last_gnss_rx_time > self.GNSS_TIMEOUT:
+            self._log.warning(
+                'Socket timeout occurred while reading GNSS data.'
+            )
+            self.last_gnss_rx_time = now
+
+        if not self.latest_nmea_data_valid:
+            self._log.debug('Waiting to receive valid NMEA data from GNSS ...')
+        elif not self.nmea_request_sent:
+            self._log.debug('Waiting for client to send valid NMEA data.')
+        elif (
+            self.ntrip_connected
+            and now - self.last_ntrip_rx_time > self.NTRIP_TIMEOUT
+        ):
+            self._log.warning(
                 'NTRIP server connection lost due to '
                 'timeout while reading RTCMv3. '
                 'Attempting to reconnect...'
             )
             self.ntrip_connected = False
 
+    def unwatch_socket(self, sock):
+        """Stop waiting for data on `sock` if it is being watched."""
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
     def run(self):
         """Run main execution loop."""
-        while not self.connect_to_gnss():
-            time.sleep(self.PAUSE_DURATION)
-            continue
-
-        self.configure_gnss()
+        # Keep the client on the configured CPU, if any
+        self.pin_to_cpu()
 
         try:
-            # Start reading GNSS logs in a separate thread
-            self.gnss_log_thread = threading.Thread(
-                target=self.read_nmea_and_send_to_server, daemon=True
+            while not self.connect_to_gnss():
+                time.sleep(self.PAUSE_DURATION)
+                continue
+
+            self.configure_gnss()
+
+            # Both sockets are served from this thread, each one is only
+            # read when the selector reports it has data
+            self.selector.register(
+                self.gnss_socket,
+                selectors.EVENT_READ,
+                self.read_nmea_and_send_to_server,
             )
-            self.gnss_log_thread.start()
+            self.last_gnss_rx_time = time.monotonic()
+            next_state_check = self.last_gnss_rx_time
+            next_ntrip_retry = 0.0
 
             while True:
                 if not self.ntrip_connected:
-                    if not self.connect_ntrip_server():
-                        time.sleep(self.PAUSE_DURATION)
-                        continue
-
-                if not self.latest_nmea_data_valid:
-                    logging.debug(
-                        'Waiting to receive valid NMEA data from GNSS ...'
-                    )
-                    time.sleep(self.PAUSE_DURATION)
-                    continue
+                    self.unwatch_socket(self.ntrip_socket)
+
+                    # Reconnect attempts are paced by a deadline rather than
+                    # a sleep, so the GNSS socket keeps being served during
+                    # an NTRIP outage
+                    if time.monotonic() >= next_ntrip_retry:
+                        if self.connect_ntrip_server():
+                            self.selector.register(
+                                self.ntrip_socket,
+                                selectors.EVENT_READ,
+                                self.read_rtcm_and_send_to_gnss,
+                            )
+                        else:
+                            next_ntrip_retry = (
+                                time.monotonic() + self.PAUSE_DURATION
+                            )
 
-                if not self.nmea_request_sent:
-                    logging.debug(
-                        'Waiting for client to send valid NMEA data.'
-                    )
-                    time.sleep(self.PAUSE_DURATION)
-                    continue
+                for key, _ in self.selector.select(self.PAUSE_DURATION):
+                    key.data()
 
-                # Read RTCM data and send to the gnss in the main thread
-                self.read_rtcm_and_send_to_gnss()
+                if time.monotonic() >= next_state_check:
+                    self.check_connection_state()
+                    next_state_check = time.monotonic() + self.PAUSE_DURATION
 
         except KeyboardInterrupt:
-            logging.info('Interrupted by user. Disconnecting...')
-            logging.debug(
-                f'\nReceived RTCM msgs types:\n'
-                f'{self.received_rtcm_msgs_ids}'
+            self._log.info('Interrupted by user. Disconnecting...')
+            self._log.debug(
+                '\nReceived RTCM msgs types:\n%s',
+                self.received_rtcm_msgs_ids,
             )
         finally:
-            self.stop_event.set()
-            self.gnss_log_thread.join()
+            self.selector.close()
             self.disconnect_ntrip_server()
+            if self.gnss_socket:
+                self.gnss_socket.close()
 
 
 if __name__ == '__main__':